@@ -2,19 +2,179 @@
 Database service for Supabase operations
 """
 import os
-from typing import List, Optional, Dict, Any
+from threading import Lock, RLock
+from typing import List, Optional, Dict, Any, Callable, Tuple
+import httpx
+import orjson
+from cachetools import TTLCache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
 from models import ResumeDB, JobSearchDB, MatchResultDB
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    print("Warning: redis not available. Read cache is per process.")
+
+
+class DatabaseError(Exception):
+    """Raised when a Supabase query fails (after retries)"""
+
+
+# Short-lived cache for per-user read queries (dashboard, list endpoints).
+# Keys are tuples starting with the user_id so writes can invalidate them.
+# The in-process cache is only invalidated by writes in the same process, so
+# multi-worker deployments must set REDIS_URL: entries then live in one Redis
+# hash per user, which any worker can drop on write.
+CACHE_TTL = 60
+_cache: TTLCache = TTLCache(maxsize=4096, ttl=CACHE_TTL)
+REDIS_URL = os.getenv("REDIS_URL")
+# Connections are opened lazily (and reopened after fork by redis-py)
+_redis = redis.Redis.from_url(REDIS_URL) if REDIS_AVAILABLE and REDIS_URL else None
+# Failed reads are remembered briefly so callers don't re-hammer Supabase
+_failures: TTLCache = TTLCache(maxsize=1024, ttl=5)
+_lock = RLock()
+
+# Columns returned for match history / recent activity (keep in sync with the
+# recent_activity select in get_dashboard_stats, database/schema.sql)
+RECENT_ACTIVITY_COLS = (
+    'id,job_search_id,resume_id,match_score,matched_skills,missing_skills,created_at,'
+    'resumes(filename,name),job_searches(job_title)'
+)
+
+# PostgREST errors worth retrying: HTTP 429/5xx (reported as the status code
+# when the body isn't JSON), PostgREST connection/schema-cache errors, and
+# Postgres serialization failures and deadlocks
+TRANSIENT_API_ERROR_CODES = frozenset({
+    '429', '500', '502', '503', '504',
+    'PGRST000', 'PGRST001', 'PGRST002',
+    '40001', '40P01'
+})
+
+# Errors that mean "not found" for by-id lookups: .single() matched no row
+# (PGRST116), or the id is not a valid UUID (22P02)
+NOT_FOUND_CODES = frozenset({'PGRST116', '22P02'})
+
+def _is_transient(e: BaseException) -> bool:
+    """True for network errors and transient PostgREST errors"""
+    if isinstance(e, httpx.HTTPError):
+        return True
+    return isinstance(e, APIError) and str(e.code) in TRANSIENT_API_ERROR_CODES
+
+# Maximum rows per bulk insert request
+MATCH_INSERT_CHUNK = 500
+
+# Shared Supabase client so HTTP keep-alive connections stay warm across requests
+_client: Optional[Client] = None
+_client_lock = Lock()
+
+def _get_client() -> Client:
+    """Create the Supabase client once and reuse it"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                supabase_url = os.getenv("SUPABASE_URL")
+                supabase_key = os.getenv("SUPABASE_SERVICE_KEY")  # Use service key for backend
+                
+                if not supabase_url or not supabase_key:
+                    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in environment")
+                
+                _client = create_client(supabase_url, supabase_key)
+    return _client
+
 class DatabaseService:
+    """
+    Supabase data access for resumes, job searches and match results
+    
+    Related rows are fetched with PostgREST embeds (e.g. '*, resumes(*)') in the
+    same request. Do not loop over results issuing per-row follow-up queries.
+    """
+    
     def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY")  # Use service key for backend
-        
-        if not supabase_url or not supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in environment")
-        
-        self.client: Client = create_client(supabase_url, supabase_key)
+        self.client: Client = _get_client()
+    
+    # ==================== CACHE ====================
+    
+    @retry(
+        retry=retry_if_exception(_is_transient),
+        wait=wait_exponential(min=0.1, max=2),
+        stop=stop_after_attempt(3),
+        reraise=True
+    )
+    def _execute(self, query: Any) -> Any:
+        """
+        Execute a read (or idempotent) query, retrying transient HTTP and
+        PostgREST errors with exponential backoff. Inserts are executed directly, never retried.
+        """
+        return query.execute()
+    
+    def _cached(self, key: Tuple, fn: Callable[[], Any]) -> Any:
+        """Return cached value for key, or call fn and cache its result"""
+        if _redis is not None:
+            return self._cached_shared(key, fn)
+        with _lock:
+            try:
+                return _cache[key]
+            except KeyError:
+                pass
+            error = _failures.get(key)
+        if error is not None:
+            raise error
+        try:
+            value = fn()
+        except Exception as e:
+            with _lock:
+                _failures[key] = e
+            raise
+        with _lock:
+            _cache[key] = value
+        return value
+    
+    def _cached_shared(self, key: Tuple, fn: Callable[[], Any]) -> Any:
+        """_cached backed by Redis (shared by all workers)"""
+        name = f"cache:{key[0]}"
+        field = orjson.dumps(key[1:])
+        try:
+            hit = _redis.hget(name, field)
+            if hit is not None:
+                return orjson.loads(hit)
+        except redis.RedisError as e:
+            print(f"Error reading cache: {e}")
+        with _lock:
+            error = _failures.get(key)
+        if error is not None:
+            raise error
+        try:
+            value = fn()
+        except Exception as e:
+            with _lock:
+                _failures[key] = e
+            raise
+        try:
+            # TTL is set when the user's hash is created, so no entry outlives it
+            pipe = _redis.pipeline()
+            pipe.hset(name, field, orjson.dumps(value))
+            pipe.expire(name, CACHE_TTL, nx=True)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Error writing cache: {e}")
+        return value
+    
+    def _invalidate_user(self, user_id: str) -> None:
+        """Drop all cached reads (and remembered read failures) belonging to a user"""
+        with _lock:
+            for cache in (_cache, _failures):
+                for key in [k for k in cache.keys() if k[0] == user_id]:
+                    cache.pop(key, None)
+        if _redis is not None:
+            try:
+                _redis.delete(f"cache:{user_id}")
+            except redis.RedisError as e:
+                print(f"Error invalidating cache: {e}")
     
     # ==================== RESUMES ====================
     
@@ -22,66 +182,68 @@ class DatabaseService:
         """Save a resume to database"""
         try:
             response = self.client.table('resumes').insert(resume_data).execute()
+            self._invalidate_user(resume_data.get('user_id'))
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error saving resume: {e}")
-            raise
+            raise DatabaseError(f"Error saving resume: {e}") from e
     
     def get_user_resumes(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all resumes for a user"""
         try:
-            response = self.client.table('resumes')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('created_at', desc=True)\
-                .range(offset, offset + limit - 1)\
-                .execute()
-            return response.data
+            def fetch():
+                response = self._execute(self.client.rpc(
+                    'list_user_resumes',
+                    {'uid': user_id, 'lim': limit, 'off': offset}
+                ))
+                return response.data
+            
+            return self._cached((user_id, 'resumes', limit, offset), fetch)
         except Exception as e:
             print(f"Error fetching resumes: {e}")
-            return []
+            raise DatabaseError(f"Error fetching resumes: {e}") from e
     
     def get_resume_by_id(self, resume_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific resume by ID"""
         try:
-            response = self.client.table('resumes')\
+            query = self.client.table('resumes')\
                 .select('*')\
                 .eq('id', resume_id)\
                 .eq('user_id', user_id)\
-                .single()\
-                .execute()
+                .single()
+            response = self._execute(query)
             return response.data
         except Exception as e:
+            if isinstance(e, APIError) and e.code in NOT_FOUND_CODES:
+                return None
             print(f"Error fetching resume: {e}")
-            return None
+            raise DatabaseError(f"Error fetching resume: {e}") from e
     
     def delete_resume(self, resume_id: str, user_id: str) -> bool:
         """Delete a resume"""
         try:
-            self.client.table('resumes')\
+            query = self.client.table('resumes')\
                 .delete()\
                 .eq('id', resume_id)\
-                .eq('user_id', user_id)\
-                .execute()
+                .eq('user_id', user_id)
+            self._execute(query)
+            self._invalidate_user(user_id)
             return True
         except Exception as e:
             print(f"Error deleting resume: {e}")
-            return False
+            raise DatabaseError(f"Error deleting resume: {e}") from e
     
     def search_resumes(self, user_id: str, query: str) -> List[Dict[str, Any]]:
         """Search resumes by name, email, or skills"""
         try:
-            # Use ilike for case-insensitive search
-            response = self.client.table('resumes')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .or_(f"name.ilike.%{query}%,email.ilike.%{query}%")\
-                .order('created_at', desc=True)\
-                .execute()
+            # Escape LIKE wildcards so user input is matched literally; the query
+            # is bound as an RPC parameter instead of being spliced into the filter
+            safe_query = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            response = self._execute(self.client.rpc('search_resumes', {'uid': user_id, 'q': safe_query}))
             return response.data
         except Exception as e:
             print(f"Error searching resumes: {e}")
-            return []
+            raise DatabaseError(f"Error searching resumes: {e}") from e
     
     # ==================== JOB SEARCHES ====================
     
@@ -89,38 +251,42 @@ class DatabaseService:
         """Save a job search to database"""
         try:
             response = self.client.table('job_searches').insert(job_data).execute()
+            self._invalidate_user(job_data.get('user_id'))
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error saving job search: {e}")
-            raise
+            raise DatabaseError(f"Error saving job search: {e}") from e
     
     def get_user_job_searches(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all job searches for a user"""
         try:
-            response = self.client.table('job_searches')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('created_at', desc=True)\
-                .range(offset, offset + limit - 1)\
-                .execute()
-            return response.data
+            def fetch():
+                response = self._execute(self.client.rpc(
+                    'list_user_job_searches',
+                    {'uid': user_id, 'lim': limit, 'off': offset}
+                ))
+                return response.data
+            
+            return self._cached((user_id, 'job_searches', limit, offset), fetch)
         except Exception as e:
             print(f"Error fetching job searches: {e}")
-            return []
+            raise DatabaseError(f"Error fetching job searches: {e}") from e
     
     def get_job_search_by_id(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific job search by ID"""
         try:
-            response = self.client.table('job_searches')\
+            query = self.client.table('job_searches')\
                 .select('*')\
                 .eq('id', job_id)\
                 .eq('user_id', user_id)\
-                .single()\
-                .execute()
+                .single()
+            response = self._execute(query)
             return response.data
         except Exception as e:
+            if isinstance(e, APIError) and e.code in NOT_FOUND_CODES:
+                return None
             print(f"Error fetching job search: {e}")
-            return None
+            raise DatabaseError(f"Error fetching job search: {e}") from e
     
     # ==================== MATCH RESULTS ====================
     
@@ -128,86 +294,85 @@ class DatabaseService:
         """Save a match result to database"""
         try:
             response = self.client.table('match_results').insert(match_data).execute()
+            self._invalidate_user(match_data.get('user_id'))
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error saving match result: {e}")
-            raise
+            raise DatabaseError(f"Error saving match result: {e}") from e
+    
+    def save_match_results(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Save many match results with one insert per chunk of rows"""
+        if not rows:
+            return []
+        try:
+            saved = []
+            # Chunk to stay under PostgREST's request size limit
+            for i in range(0, len(rows), MATCH_INSERT_CHUNK):
+                response = self.client.table('match_results').insert(rows[i:i + MATCH_INSERT_CHUNK]).execute()
+                saved.extend(response.data or [])
+            for user_id in {row.get('user_id') for row in rows}:
+                self._invalidate_user(user_id)
+            return saved
+        except Exception as e:
+            print(f"Error saving match results: {e}")
+            raise DatabaseError(f"Error saving match results: {e}") from e
     
     def get_job_matches(self, job_search_id: str, user_id: str) -> List[Dict[str, Any]]:
-        """Get all match results for a job search"""
+        """Get all match results for a job search with their resume and job title embedded"""
         try:
-            response = self.client.table('match_results')\
-                .select('*, resumes(*)')\
-                .eq('job_search_id', job_search_id)\
-                .eq('user_id', user_id)\
-                .order('match_score', desc=True)\
-                .execute()
-            return response.data
+            def fetch():
+                # Only the job title is embedded: job_searches(*) would copy the
+                # full job_description into every match row
+                query = self.client.table('match_results')\
+                    .select('*, resumes(*), job_searches(job_title)')\
+                    .eq('job_search_id', job_search_id)\
+                    .eq('user_id', user_id)\
+                    .order('match_score', desc=True)
+                response = self._execute(query)
+                return response.data
+            
+            return self._cached((user_id, 'job_matches', job_search_id), fetch)
         except Exception as e:
             print(f"Error fetching match results: {e}")
-            return []
+            raise DatabaseError(f"Error fetching match results: {e}") from e
     
     def get_user_matches(self, user_id: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all match results for a user"""
         try:
-            response = self.client.table('match_results')\
-                .select('*, resumes(filename, name), job_searches(job_title)')\
-                .eq('user_id', user_id)\
-                .order('created_at', desc=True)\
-                .range(offset, offset + limit - 1)\
-                .execute()
-            return response.data
+            def fetch():
+                query = self.client.table('match_results')\
+                    .select(RECENT_ACTIVITY_COLS)\
+                    .eq('user_id', user_id)\
+                    .order('created_at', desc=True)\
+                    .range(offset, offset + limit - 1)
+                response = self._execute(query)
+                return response.data
+            
+            return self._cached((user_id, 'matches', limit, offset), fetch)
         except Exception as e:
             print(f"Error fetching user matches: {e}")
-            return []
+            raise DatabaseError(f"Error fetching user matches: {e}") from e
     
     # ==================== STATISTICS ====================
     
     def get_dashboard_stats(self, user_id: str) -> Dict[str, Any]:
         """Get dashboard statistics for a user"""
         try:
-            # Count total resumes
-            resumes_count = self.client.table('resumes')\
-                .select('id', count='exact')\
-                .eq('user_id', user_id)\
-                .execute()
-            
-            # Count total job searches
-            jobs_count = self.client.table('job_searches')\
-                .select('id', count='exact')\
-                .eq('user_id', user_id)\
-                .execute()
-            
-            # Count total matches and get average score
-            matches = self.client.table('match_results')\
-                .select('match_score')\
-                .eq('user_id', user_id)\
-                .execute()
-            
-            total_matches = len(matches.data) if matches.data else 0
-            avg_score = sum(m['match_score'] for m in matches.data) / total_matches if total_matches > 0 else 0
-            
-            # Get recent activity
-            recent = self.client.table('match_results')\
-                .select('*, resumes(filename, name), job_searches(job_title)')\
-                .eq('user_id', user_id)\
-                .order('created_at', desc=True)\
-                .limit(10)\
-                .execute()
+            def fetch():
+                # Counts, average score and recent activity are computed in one
+                # Postgres function (see database/schema.sql) to avoid four round-trips
+                response = self._execute(self.client.rpc('get_dashboard_stats', {'uid': user_id}))
+                stats = response.data or {}
+                
+                return {
+                    'total_resumes': stats.get('total_resumes') or 0,
+                    'total_job_searches': stats.get('total_job_searches') or 0,
+                    'total_matches': stats.get('total_matches') or 0,
+                    'avg_match_score': float(stats.get('avg_match_score') or 0),
+                    'recent_activity': stats.get('recent_activity') or []
+                }
             
-            return {
-                'total_resumes': resumes_count.count or 0,
-                'total_job_searches': jobs_count.count or 0,
-                'total_matches': total_matches,
-                'avg_match_score': round(avg_score, 2) if avg_score else 0,
-                'recent_activity': recent.data or []
-            }
+            return self._cached((user_id, 'dashboard_stats'), fetch)
         except Exception as e:
             print(f"Error fetching dashboard stats: {e}")
-            return {
-                'total_resumes': 0,
-                'total_job_searches': 0,
-                'total_matches': 0,
-                'avg_match_score': 0,
-                'recent_activity': []
-            }
+            raise DatabaseError(f"Error fetching dashboard stats: {e}") from e
@@ -4,10 +4,84 @@ Extracts skills, roles, and requirements from job descriptions using PURE NLP
 """
 
 import re
-from typing import Dict, List
+import hashlib
+from threading import Lock
+from typing import Dict, List, Optional
+from cachetools import TTLCache
 from nlp_processor import NLPProcessor
 
 
+# analyze() is deterministic, so results are cached by a hash of the description
+_ANALYSIS_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=3600)
+_ANALYSIS_LOCK = Lock()
+
+def _copy_analysis(result: Dict) -> Dict:
+    """Copy of a cached analysis so callers can't mutate the cached lists"""
+    return {k: list(v) if isinstance(v, list) else v for k, v in result.items()}
+
+
+# Descriptions shorter than this take the cheaper skill-extraction path
+_SHORT_DESCRIPTION_CHARS = 400
+
+# Regex patterns compiled once at import (used on every analyze call)
+# Technical terms are fused into one alternation so the text is scanned once
+_TECH_PATTERN = re.compile(
+    r'(?P<js>\b[A-Z][a-zA-Z]*\.js\b)'              # Node.js, React.js
+    r'|(?P<cpp>\b[A-Z][a-zA-Z]*\+\+(?!\w))'        # C++
+    r'|(?P<sharp>\b[A-Z]#(?!\w))'                  # C#, F#
+    r'|(?P<script>\b[A-Z][a-zA-Z]+Script\b)'       # JavaScript, TypeScript
+    r'|(?P<acr>\b[A-Z]{2,}\b)'                     # AWS, SQL, API
+    r'|(?P<camel>\b[A-Z][a-z]+(?:[A-Z][a-z]+)+\b)' # PostgreSQL, MongoDB
+)
+
+_MULTI_WORD = re.compile(
+    r'\b(?:machine learning|deep learning|data science|cloud computing|'
+    r'web development|full stack|front end|back end|software engineering|'
+    r'ci/cd|devops|microservices|rest api|graphql)\b'
+)
+
+# Experience: "3-5 years" or "5+ years of experience" in one case-insensitive scan
+_EXP = re.compile(
+    r'(?P<range>(\d+)-(\d+)\s*(?:years?|yrs?))'
+    r'|(?P<single>(\d+)\+?\s*(?:years?|yrs?)(?:\s+of)?\s+experience)',
+    re.I
+)
+
+# Likely role terms (keywords containing a common role suffix)
+_ROLE_RE = re.compile('|'.join(map(re.escape, [
+    'developer', 'engineer', 'manager', 'architect', 'analyst',
+    'designer', 'specialist', 'lead', 'director', 'coordinator'
+])))
+
+# Common words to exclude from keywords (but NOT testing/tester/developer)
+_EXCLUDE_WORDS = frozenset({
+    'looking', 'must', 'year', 'years', 'required', 'need', 'seeking',
+    'candidate', 'should', 'strong', 'excellent', 'good', 'work',
+    'working', 'team', 'ability', 'knowledge', 'position', 'job'
+})
+
+_CLEAN = re.compile(r'[^a-zA-Z0-9+#.]')
+
+# Whitespace-delimited words that start with a capital or contain +, # or .
+# re has no Unicode uppercase class, so words starting with any non-ASCII
+# character are let through and checked with str.isupper() in the loop
+_CAPS_OR_SYMBOL = re.compile(r'(?<!\S)(?=[A-Z]|[^\x00-\x7f]|\S*[+#.])\S+')
+
+
+def _caps_or_symbol_words(text: str) -> List[str]:
+    """Cleaned, lowercased words that start with a capital or contain +, # or ."""
+    words = []
+    for m in _CAPS_OR_SYMBOL.finditer(text):
+        word = m.group(0)
+        if not (word[0].isascii() or word[0].isupper()
+                or '+' in word or '#' in word or '.' in word):
+            continue
+        clean_word = _CLEAN.sub('', word)
+        if len(clean_word) > 2:
+            words.append(clean_word.lower())
+    return words
+
+
 class JobAnalyzer:
     """
     Analyze job descriptions to extract requirements
@@ -26,92 +100,86 @@ class JobAnalyzer:
         # Use keyword extraction
         keywords = self.nlp.extract_keywords(text, top_n=15)
         
-        # Filter for likely role terms (ending with common role suffixes)
-        role_keywords = ['developer', 'engineer', 'manager', 'architect', 'analyst',
-                        'designer', 'specialist', 'lead', 'director', 'coordinator']
-        
         found_roles = []
-        text_lower = text.lower()
         
         for keyword in keywords:
             # Check if keyword contains any role term
-            if any(role in keyword for role in role_keywords):
+            if _ROLE_RE.search(keyword):
                 found_roles.append(keyword)
         
-        return list(set(found_roles))[:5]
+        return list(dict.fromkeys(found_roles))[:5]
     
-    def extract_skills(self, text: str) -> List[str]:
+    def extract_skills(self, text: str, text_lower: Optional[str] = None) -> List[str]:
         """
         Extract required skills using PURE NLP - NO HARDCODING!
         Uses Tokenization + Lemmatization + Keyword Extraction
+        
+        Args:
+            text: Original-case text (capitalization is used in step 3)
+            text_lower: Already-lowercased text, computed here if not given
         """
+        # Fast path for short inputs ("Senior Dev needed, Python, AWS"):
+        # explicit multi-word, technical and capitalized terms come first so
+        # the 20-skill cap never pushes them out, then the keywords. top_n is
+        # the same as below: lowering it saves no pipeline work
+        if len(text) < _SHORT_DESCRIPTION_CHARS:
+            short_skills: Dict[str, None] = dict.fromkeys(_MULTI_WORD.findall(text.lower()))
+            for m in _TECH_PATTERN.finditer(text):
+                short_skills[m.group(0).lower()] = None
+            for word in _caps_or_symbol_words(text):
+                short_skills[word] = None
+            for keyword in self.nlp.extract_keywords(text, top_n=30):
+                if len(keyword) > 2 and any(c.isalnum() for c in keyword):
+                    short_skills[keyword] = None
+            return list(short_skills)[:20]
+        
+        if text_lower is None:
+            text_lower = text.lower()
+        
         # Step 1: Extract keywords using TF-based importance
+        # (tokenization and lemmatization happen inside the NLP pipeline)
         keywords = self.nlp.extract_keywords(text, top_n=30)
         
-        # Step 2: Tokenize and lemmatize
-        tokens = self.nlp.tokenize(text.lower())
-        lemmatized = self.nlp.lemmatize(text.lower())
-        
-        found_skills = []
+        # Insertion-ordered set: dedup as we go, deterministic top 40
+        found_skills: Dict[str, None] = {}
         
-        # Step 3: Add important keywords
+        # Step 2: Add important keywords
         for keyword in keywords:
             if len(keyword) > 2 and any(c.isalnum() for c in keyword):
-                found_skills.append(keyword)
-        
-        # Step 4: Look for capitalized terms (often technologies/skills)
-        words = text.split()
-        for word in words:
-            clean_word = re.sub(r'[^a-zA-Z0-9+#.]', '', word)
-            if clean_word and len(clean_word) > 2:
-                if word[0].isupper() or '+' in word or '#' in word or '.' in word:
-                    found_skills.append(clean_word.lower())
-        
-        # Step 5: Extract technical terms with special patterns
-        technical_patterns = [
-            r'\b[A-Z][a-zA-Z]*\.js\b',  # Node.js, React.js
-            r'\b[A-Z][a-zA-Z]+\+\+\b',  # C++
-            r'\b[A-Z]#\b',              # C#, F#
-            r'\b[A-Z][a-zA-Z]+Script\b', # JavaScript, TypeScript
-            r'\b[A-Z]{2,}\b',           # AWS, SQL, API
-            r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)+\b',  # PostgreSQL, MongoDB
-        ]
-        
-        for pattern in technical_patterns:
-            matches = re.findall(pattern, text)
-            found_skills.extend([m.lower() for m in matches])
-        
-        # Step 6: Multi-word technical terms
-        multi_word_patterns = [
-            r'\b(?:machine learning|deep learning|data science|cloud computing|'
-            r'web development|full stack|front end|back end|software engineering|'
-            r'ci/cd|devops|microservices|rest api|graphql)\b'
-        ]
-        
-        for pattern in multi_word_patterns:
-            matches = re.findall(pattern, text.lower())
-            found_skills.extend(matches)
-        
-        return list(set(found_skills))[:40]  # Return top 40 unique skills
+                found_skills[keyword] = None
+        if len(found_skills) >= 40:
+            return list(found_skills)[:40]
+        
+        # Step 3: Look for capitalized terms (often technologies/skills)
+        for word in _caps_or_symbol_words(text):
+            found_skills[word] = None
+        if len(found_skills) >= 40:
+            return list(found_skills)[:40]
+        
+        # Step 4: Extract technical terms with special patterns
+        for m in _TECH_PATTERN.finditer(text):
+            found_skills[m.group(0).lower()] = None
+        if len(found_skills) >= 40:
+            return list(found_skills)[:40]
+        
+        # Step 5: Multi-word technical terms
+        for match in _MULTI_WORD.findall(text_lower):
+            found_skills[match] = None
+        
+        return list(found_skills)[:40]  # Return top 40 unique skills
     
     def extract_experience(self, text: str) -> str:
         """
         Extract required years of experience
         Looks for patterns like "5 years experience", "3+ years"
         """
-        patterns = [
-            r'(\d+)\+?\s*(?:years?|yrs?)(?:\s+of)?\s+experience',
-            r'(\d+)-(\d+)\s*(?:years?|yrs?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                if len(match.groups()) > 1:
-                    return f"{match.group(1)}-{match.group(2)} years"
-                return f"{match.group(1)} years"
-        
-        return "Not specified"
+        match = _EXP.search(text)
+        if not match:
+            return "Not specified"
+        
+        if match.group('range'):
+            return f"{match.group(2)}-{match.group(3)} years"
+        return f"{match.group(5)} years"
     
     def analyze(self, description: str) -> Dict:
         """
@@ -127,27 +195,34 @@ class JobAnalyzer:
             - experience: Required experience
             - keywords: Important keywords extracted
         """
+        key = hashlib.blake2b(description.encode(), digest_size=16).digest()
+        with _ANALYSIS_LOCK:
+            cached = _ANALYSIS_CACHE.get(key)
+        if cached is not None:
+            return _copy_analysis(cached)
+        
+        # Lowercase once and share it with skill extraction
+        description_lower = description.lower()
+        
         # Extract components
         roles = self.extract_roles(description)
-        skills = self.extract_skills(description)
+        skills = self.extract_skills(description, description_lower)
         experience = self.extract_experience(description)
         
         # Extract keywords using NLP and filter out common non-skill words
         all_keywords = self.nlp.extract_keywords(description, top_n=20)
         
-        # Common words to exclude from keywords (but NOT testing/tester/developer)
-        exclude_words = {
-            'looking', 'must', 'year', 'years', 'required', 'need', 'seeking',
-            'candidate', 'should', 'strong', 'excellent', 'good', 'work',
-            'working', 'team', 'ability', 'knowledge', 'position', 'job'
-        }
-        
-        # Filter keywords - keep only relevant ones
-        keywords = [kw for kw in all_keywords if kw.lower() not in exclude_words]
+        # Filter keywords - keep only relevant ones (keywords are already lowercase)
+        keywords = [kw for kw in all_keywords if kw not in _EXCLUDE_WORDS]
         
-        return {
+        result = {
             "roles": roles,
             "skills": skills,
             "experience": experience,
             "keywords": keywords[:10]  # Top 10 filtered keywords
         }
+        
+        with _ANALYSIS_LOCK:
+            _ANALYSIS_CACHE[key] = result
+        
+        return _copy_analysis(result)
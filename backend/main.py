@@ -5,19 +5,23 @@ Simple and clean implementation for NLP-based resume screening
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
+from cachetools.func import ttl_cache
+import asyncio
+import base64
 import os
-import json
+import orjson
 from dotenv import load_dotenv
 from datetime import datetime
 import uuid
 
-from nlp_processor import NLPProcessor
+from nlp_processor import get_nlp_processor
 from resume_parser import ResumeParser
 from job_analyzer import JobAnalyzer
 from matcher import ResumeMatcher
-from database import DatabaseService
+from database import DatabaseService, DatabaseError
 
 # Load environment variables
 load_dotenv()
@@ -34,7 +38,8 @@ except Exception as e:
     DB_ENABLED = False
 
 # Initialize FastAPI app
-app = FastAPI(title="Resume Parser API", version="1.0.0")
+# orjson serializes the large parsed_data / raw_text payloads much faster than stdlib json
+app = FastAPI(title="Resume Parser API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware for frontend
 app.add_middleware(
@@ -45,8 +50,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize NLP components
-nlp_processor = NLPProcessor()
+# Initialize NLP components once at import; with `gunicorn --preload` this
+# happens in the master and forked workers share the loaded models
+nlp_processor = get_nlp_processor(os.getenv("NLP_BACKEND", "nltk"))
 resume_parser = ResumeParser(nlp_processor)
 job_analyzer = JobAnalyzer(nlp_processor)
 matcher = ResumeMatcher()
@@ -65,6 +71,74 @@ class MatchResponse(BaseModel):
     extracted_data: dict
 
 
+async def parse_uploads(files: List[UploadFile]) -> list:
+    """
+    Parse uploads in parallel on the threadpool
+    
+    Each parser reads the upload's spooled file directly, so the upload is
+    never copied into a separate bytes object. Returns a list aligned with
+    files; a parse that raised is returned as the exception instance.
+    """
+    return await asyncio.gather(
+        *(asyncio.to_thread(resume_parser.parse, file.file, file.filename) for file in files),
+        return_exceptions=True
+    )
+
+
+def match_parsed_resumes(files: List[UploadFile], parsed: list, required_skills: List[str]) -> list:
+    """
+    Match parse_uploads results against the required skills
+    Returns candidates in the MatchResponse shape, highest score first
+    """
+    candidates = []
+    for file, resume_data in zip(files, parsed):
+        # Match
+        try:
+            if isinstance(resume_data, Exception):
+                raise resume_data
+            
+            # Check if parsing was successful
+            if 'error' in resume_data:
+                candidates.append({
+                    "filename": file.filename,
+                    "score": 0.0,
+                    "matched_skills": [],
+                    "extracted_data": {
+                        "error": resume_data['error'],
+                        "skills": [],
+                        "keywords": []
+                    }
+                })
+                continue
+            
+            match_result = matcher.match(resume_data, required_skills)
+            
+            candidates.append({
+                "filename": file.filename,
+                "score": match_result['score'],
+                "matched_skills": match_result['matched_skills'],
+                "extracted_data": resume_data
+            })
+        except Exception as e:
+            error_msg = str(e)
+            print(f"ERROR processing {file.filename}: {error_msg}")
+            candidates.append({
+                "filename": file.filename,
+                "score": 0.0,
+                "matched_skills": [],
+                "extracted_data": {
+                    "error": error_msg,
+                    "skills": [],
+                    "keywords": []
+                }
+            })
+    
+    # Sort by score (highest first)
+    candidates.sort(key=lambda x: x['score'], reverse=True)
+    
+    return candidates
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -117,25 +191,18 @@ async def parse_resumes(files: List[UploadFile] = File(...)):
     """
     results = []
     
-    for file in files:
+    parsed = await parse_uploads(files)
+    for file, parsed_data in zip(files, parsed):
         try:
-            # Save temporarily
-            temp_path = f"temp_{file.filename}"
-            content = await file.read()
-            with open(temp_path, "wb") as f:
-                f.write(content)
+            if isinstance(parsed_data, Exception):
+                raise parsed_data
             
-            # Parse resume
-            parsed_data = resume_parser.parse(temp_path)
             results.append({
                 "filename": file.filename,
                 "success": True,
                 "data": parsed_data
             })
             
-            # Cleanup
-            os.remove(temp_path)
-            
         except Exception as e:
             results.append({
                 "filename": file.filename,
@@ -158,7 +225,7 @@ async def match_resumes(
     """
     try:
         # Parse job_input JSON
-        job_data = json.loads(job_input)
+        job_data = orjson.loads(job_input)
         
         # Analyze job
         if job_data.get('description'):
@@ -169,87 +236,53 @@ async def match_resumes(
             raw_keywords = job_data.get('keywords', [])
             required_skills = []
             for keyword in raw_keywords:
-                clean_keyword = keyword.strip().lower()
-                # Add original keyword
-                required_skills.append(clean_keyword)
-                # Tokenize first (required for lemmatization and stemming)
-                tokens = nlp_processor.tokenize(clean_keyword)
-                # Add lemmatized version (converts to dictionary form)
-                lemmatized_tokens = nlp_processor.lemmatize(tokens)
-                required_skills.extend(lemmatized_tokens)
-                # Add stemmed version (more aggressive, finds word roots)
-                # This helps match: tester → test, testing → test
-                stemmed_tokens = nlp_processor.stem(tokens)
-                required_skills.extend(stemmed_tokens)
-                
-                # Manually add "test" for "tester" since Porter Stemmer doesn't stem it
-                if clean_keyword == 'tester':
-                    required_skills.append('test')
+                # Original keyword plus lemmatized and stemmed forms (cached)
+                required_skills.extend(nlp_processor.expand_keyword(keyword.strip().lower()))
             
             # Remove duplicates while preserving order
             seen = set()
             required_skills = [x for x in required_skills if not (x in seen or seen.add(x))]
         
         # Parse all resumes
-        candidates = []
-        for file in files:
-            temp_path = f"temp_{file.filename}"
-            content = await file.read()
-            with open(temp_path, "wb") as f:
-                f.write(content)
-            
-            # Parse and match
-            try:
-                resume_data = resume_parser.parse(temp_path)
-                
-                # Check if parsing was successful
-                if 'error' in resume_data:
-                    candidates.append({
-                        "filename": file.filename,
-                        "score": 0.0,
-                        "matched_skills": [],
-                        "extracted_data": {
-                            "error": resume_data['error'],
-                            "skills": [],
-                            "keywords": []
-                        }
-                    })
-                    continue
-                
-                match_result = matcher.match(resume_data, required_skills)
-                
-                candidates.append({
-                    "filename": file.filename,
-                    "score": match_result['score'],
-                    "matched_skills": match_result['matched_skills'],
-                    "extracted_data": resume_data
-                })
-            except Exception as e:
-                error_msg = str(e)
-                print(f"ERROR processing {file.filename}: {error_msg}")
-                candidates.append({
-                    "filename": file.filename,
-                    "score": 0.0,
-                    "matched_skills": [],
-                    "extracted_data": {
-                        "error": error_msg,
-                        "skills": [],
-                        "keywords": []
-                    }
-                })
-            
-            os.remove(temp_path)
-        
-        # Sort by score (highest first)
-        candidates.sort(key=lambda x: x['score'], reverse=True)
+        parsed = await parse_uploads(files)
+        candidates = match_parsed_resumes(files, parsed, required_skills)
         
-        return candidates
+        # Candidates are built to the MatchResponse shape already; returning a
+        # Response skips re-validating every extracted_data dict against the model
+        return ORJSONResponse(candidates)
     
     except Exception as e:
         raise HTTPException(500, f"Matching failed: {str(e)}")
 
 
 # ==================== DATABASE-INTEGRATED ENDPOINTS ====================
+# Read endpoints below are plain `def` on purpose: the Supabase client is
+# synchronous, so FastAPI runs them in its threadpool instead of blocking
+# the event loop for the whole HTTPS round-trip.
+
+@ttl_cache(maxsize=10_000, ttl=300)
+def _decode_jwt_sub(token: str) -> str:
+    """
+    Return the 'sub' claim of a JWT payload
+    Cached per token, since a client sends the same token on every request
+    """
+    # JWT tokens have 3 parts: header.payload.signature
+    # We need the payload (middle part)
+    parts = token.split('.')
+    if len(parts) != 3:
+        raise HTTPException(401, "Invalid JWT token format")
+    
+    # Over-padding is ignored by the decoder, so no padding math is needed
+    payload_json = base64.urlsafe_b64decode(parts[1] + '===')
+    payload = orjson.loads(payload_json)
+    
+    # Extract user_id from 'sub' field
+    user_id = payload.get('sub')
+    if not user_id:
+        raise HTTPException(401, "No user ID found in token")
+    
+    return user_id
+
 
 def get_user_id(authorization: str = Header(None)) -> str:
     """Extract user ID from JWT token in authorization header"""
@@ -264,29 +297,7 @@ def get_user_id(authorization: str = Header(None)) -> str:
         raise HTTPException(401, "Invalid authorization token")
     
     try:
-        import base64
-        # JWT tokens have 3 parts: header.payload.signature
-        # We need the payload (middle part)
-        parts = token.split('.')
-        if len(parts) != 3:
-            raise HTTPException(401, "Invalid JWT token format")
-        
-        # Decode the payload (add padding if needed)
-        payload_encoded = parts[1]
-        # Add padding for base64 decoding
-        padding = 4 - len(payload_encoded) % 4
-        if padding != 4:
-            payload_encoded += '=' * padding
-        
-        payload_json = base64.urlsafe_b64decode(payload_encoded)
-        payload = json.loads(payload_json)
-        
-        # Extract user_id from 'sub' field
-        user_id = payload.get('sub')
-        if not user_id:
-            raise HTTPException(401, "No user ID found in token")
-        
-        return user_id
+        return _decode_jwt_sub(token)
     except Exception as e:
         print(f"Error decoding JWT: {e}")
         raise HTTPException(401, f"Invalid token: {str(e)}")
@@ -303,6 +314,7 @@ async def match_and_save_resumes(
     Saves: resumes, job search, and match results
     Falls back to simple matching if database unavailable
     """
+    parsed = None
     try:
         user_id = get_user_id(authorization)
         
@@ -312,7 +324,7 @@ async def match_and_save_resumes(
             return await match_resumes(job_input, files)
         
         # Parse job_input JSON
-        job_data = json.loads(job_input)
+        job_data = orjson.loads(job_input)
         
         # Analyze job
         if job_data.get('description'):
@@ -334,15 +346,7 @@ async def match_and_save_resumes(
             raw_keywords = job_data.get('keywords', [])
             required_skills = []
             for keyword in raw_keywords:
-                clean_keyword = keyword.strip().lower()
-                required_skills.append(clean_keyword)
-                tokens = nlp_processor.tokenize(clean_keyword)
-                lemmatized_tokens = nlp_processor.lemmatize(tokens)
-                required_skills.extend(lemmatized_tokens)
-                stemmed_tokens = nlp_processor.stem(tokens)
-                required_skills.extend(stemmed_tokens)
-                if clean_keyword == 'tester':
-                    required_skills.append('test')
+                required_skills.extend(nlp_processor.expand_keyword(keyword.strip().lower()))
             
             required_skills = list(dict.fromkeys(required_skills))  # Remove duplicates
             
@@ -354,20 +358,28 @@ async def match_and_save_resumes(
                 'required_skills': required_skills
             }
         
-        # Save job search
-        saved_job = db_service.save_job_search(job_search_data)
+        # Save job search while the resumes are parsed. The Supabase client is
+        # synchronous, so DB calls run on the threadpool, not the event loop.
+        # Both are always awaited to completion: if the save fails, the
+        # fallback below reuses the parsed results rather than re-reading
+        # uploads that the parse threads could still be reading
+        saved_job, parse_result = await asyncio.gather(
+            asyncio.to_thread(db_service.save_job_search, job_search_data),
+            parse_uploads(files),
+            return_exceptions=True
+        )
+        if isinstance(parse_result, Exception):
+            raise parse_result
+        parsed = parse_result
+        if isinstance(saved_job, Exception):
+            raise saved_job
         job_search_id = saved_job['id']
         
-        # Parse all resumes and save to database
-        candidates = []
-        for file in files:
-            temp_path = f"temp_{file.filename}"
-            content = await file.read()
-            with open(temp_path, "wb") as f:
-                f.write(content)
-            
+        async def save_and_match(file: UploadFile, resume_data):
+            """Save one parsed resume and match it; returns (candidate, match row or None)"""
             try:
-                resume_data = resume_parser.parse(temp_path)
+                if isinstance(resume_data, Exception):
+                    raise resume_data
                 
                 if 'error' not in resume_data:
                     # Save resume to database
@@ -375,7 +387,7 @@ async def match_and_save_resumes(
                         'user_id': user_id,
                         'filename': file.filename,
                         'file_type': file.content_type,
-                        'file_size': len(content),
+                        'file_size': file.size,
                         'name': resume_data.get('name'),
                         'email': resume_data.get('email'),
                         'phone': resume_data.get('phone'),
@@ -385,63 +397,80 @@ async def match_and_save_resumes(
                         'raw_text': resume_data.get('raw_text'),
                         'parsed_data': resume_data
                     }
-                    saved_resume = db_service.save_resume(resume_db_data)
+                    saved_resume = await asyncio.to_thread(db_service.save_resume, resume_db_data)
                     resume_id = saved_resume['id']
                     
                     # Match resume
                     match_result = matcher.match(resume_data, required_skills)
                     
-                    # Save match result to database
-                    match_db_data = {
+                    # Match rows are inserted in one request below
+                    match_row = {
                         'user_id': user_id,
                         'job_search_id': job_search_id,
                         'resume_id': resume_id,
                         'match_score': match_result['score'],
                         'matched_skills': match_result['matched_skills'],
-                        'missing_skills': [s for s in required_skills if s not in match_result['matched_skills']]
+                        'missing_skills': match_result['missing_skills']
                     }
-                    db_service.save_match_result(match_db_data)
                     
-                    candidates.append({
+                    return {
                         "filename": file.filename,
                         "score": match_result['score'],
                         "matched_skills": match_result['matched_skills'],
                         "extracted_data": resume_data
-                    })
+                    }, match_row
                 else:
-                    candidates.append({
+                    return {
                         "filename": file.filename,
                         "score": 0.0,
                         "matched_skills": [],
                         "extracted_data": resume_data
-                    })
+                    }, None
             except Exception as e:
                 print(f"ERROR processing {file.filename}: {str(e)}")
-                candidates.append({
+                return {
                     "filename": file.filename,
                     "score": 0.0,
                     "matched_skills": [],
                     "extracted_data": {"error": str(e)}
-                })
-            
-            os.remove(temp_path)
+                }, None
+        
+        # Resume saves for different files run concurrently
+        results = await asyncio.gather(
+            *(save_and_match(file, resume_data) for file, resume_data in zip(files, parsed))
+        )
+        candidates = [candidate for candidate, _ in results]
+        match_rows = [row for _, row in results if row is not None]
+        
+        # Save all match results in a single bulk insert. The job search and
+        # resumes are already saved, so a failure here is logged and the
+        # computed results are still returned (no re-parse in the fallback)
+        try:
+            await asyncio.to_thread(db_service.save_match_results, match_rows)
+        except Exception as e:
+            print(f"⚠️  Saving match results failed for job search {job_search_id}: {e}")
         
         # Sort by score
         candidates.sort(key=lambda x: x['score'], reverse=True)
         
-        return candidates
+        # Candidates are built to the MatchResponse shape already; returning a
+        # Response skips re-validating every extracted_data dict against the model
+        return ORJSONResponse(candidates)
     
     except Exception as e:
         # If database save fails, fallback to simple matching without saving
         print(f"⚠️  Database save failed, falling back to simple matching: {e}")
         try:
+            if parsed is not None:
+                # Uploads were already parsed; match those instead of parsing again
+                return ORJSONResponse(match_parsed_resumes(files, parsed, required_skills))
             return await match_resumes(job_input, files)
         except Exception as fallback_error:
             raise HTTPException(500, f"Matching failed: {str(fallback_error)}")
 
 
 @app.get("/api/resumes")
-async def get_resumes(
+def get_resumes(
     authorization: str = Header(None),
     limit: int = 50,
     offset: int = 0
@@ -451,12 +480,14 @@ async def get_resumes(
         user_id = get_user_id(authorization)
         resumes = db_service.get_user_resumes(user_id, limit, offset)
         return resumes  # Return array directly, not wrapped in object
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to fetch resumes: {str(e)}")
 
 
 @app.get("/api/resumes/{resume_id}")
-async def get_resume(resume_id: str, authorization: str = Header(None)):
+def get_resume(resume_id: str, authorization: str = Header(None)):
     """Get a specific resume by ID"""
     try:
         user_id = get_user_id(authorization)
@@ -466,12 +497,14 @@ async def get_resume(resume_id: str, authorization: str = Header(None)):
         return resume
     except HTTPException:
         raise
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to fetch resume: {str(e)}")
 
 
 @app.delete("/api/resumes/{resume_id}")
-async def delete_resume(resume_id: str, authorization: str = Header(None)):
+def delete_resume(resume_id: str, authorization: str = Header(None)):
     """Delete a resume"""
     try:
         user_id = get_user_id(authorization)
@@ -481,12 +514,14 @@ async def delete_resume(resume_id: str, authorization: str = Header(None)):
         return {"message": "Resume deleted successfully"}
     except HTTPException:
         raise
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to delete resume: {str(e)}")
 
 
 @app.get("/api/job-searches")
-async def get_job_searches(
+def get_job_searches(
     authorization: str = Header(None),
     limit: int = 50,
     offset: int = 0
@@ -496,12 +531,14 @@ async def get_job_searches(
         user_id = get_user_id(authorization)
         searches = db_service.get_user_job_searches(user_id, limit, offset)
         return searches  # Return array directly, not wrapped in object
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to fetch job searches: {str(e)}")
 
 
 @app.get("/api/matches")
-async def get_matches(
+def get_matches(
     authorization: str = Header(None),
     limit: int = 100,
     offset: int = 0
@@ -511,28 +548,34 @@ async def get_matches(
         user_id = get_user_id(authorization)
         matches = db_service.get_user_matches(user_id, limit, offset)
         return matches  # Return array directly, not wrapped in object
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to fetch matches: {str(e)}")
 
 
 @app.get("/api/job-searches/{job_id}/matches")
-async def get_job_matches(job_id: str, authorization: str = Header(None)):
+def get_job_matches(job_id: str, authorization: str = Header(None)):
     """Get all matches for a specific job search"""
     try:
         user_id = get_user_id(authorization)
         matches = db_service.get_job_matches(job_id, user_id)
         return {"matches": matches}
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to fetch job matches: {str(e)}")
 
 
 @app.get("/api/dashboard/stats")
-async def get_dashboard_stats(authorization: str = Header(None)):
+def get_dashboard_stats(authorization: str = Header(None)):
     """Get dashboard statistics for the authenticated user"""
     try:
         user_id = get_user_id(authorization)
         stats = db_service.get_dashboard_stats(user_id)
         return stats
+    except DatabaseError as e:
+        raise HTTPException(503, f"Database unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(500, f"Failed to fetch dashboard stats: {str(e)}")
 
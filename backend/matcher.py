@@ -3,16 +3,87 @@ Resume Matcher - Match resumes to job requirements
 Uses Levenshtein distance for fuzzy skill matching
 """
 
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional
 
+try:
+    import numpy as np
+    from rapidfuzz import process
+    from rapidfuzz.distance import Levenshtein
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+    print("Warning: rapidfuzz not available. Using fallback Levenshtein distance.")
 
-def levenshtein_distance(s1: str, s2: str) -> int:
+# numba depends on numpy, so np is already bound by the import above
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # DP cells never exceed the longer length, so short skills fit in int8 rows
+    _INT8_MAX_LEN = 127
+    
+    @njit(cache=True)
+    def _levenshtein_kernel(a, b, previous_row, current_row):
+        """Wagner-Fischer DP on code point arrays (b the shorter) using the given row buffers"""
+        n = b.shape[0]
+        for j in range(n + 1):
+            previous_row[j] = j
+        for i in range(a.shape[0]):
+            current_row[0] = i + 1
+            for j in range(n):
+                insertions = previous_row[j + 1] + 1
+                deletions = current_row[j] + 1
+                substitutions = previous_row[j] + (a[i] != b[j])
+                current_row[j + 1] = min(insertions, deletions, substitutions)
+            previous_row, current_row = current_row, previous_row
+        return previous_row[n]
+    
+    def _codepoints(s: str):
+        """String as a uint32 array of code points (no per-row list allocation)"""
+        return np.frombuffer(s.encode('utf-32-le'), dtype=np.uint32)
+    
+    def _numba_distance(s1: str, s2: str) -> int:
+        """Levenshtein distance via the JIT kernel, with int8 rows when they fit"""
+        a, b = _codepoints(s1), _codepoints(s2)
+        if a.shape[0] < b.shape[0]:
+            a, b = b, a
+        dtype = np.int8 if a.shape[0] <= _INT8_MAX_LEN else np.int32
+        n = b.shape[0]
+        return int(_levenshtein_kernel(a, b, np.empty(n + 1, dtype=dtype), np.empty(n + 1, dtype=dtype)))
+    
+    # Compile both row widths at import so the first request doesn't pay JIT
+    # latency (only when the kernel is used, i.e. rapidfuzz is missing)
+    if not RAPIDFUZZ_AVAILABLE:
+        _numba_distance("warm", "up")
+        _numba_distance("w" * (_INT8_MAX_LEN + 1), "up")
+
+
+def levenshtein_distance(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
     """
     Calculate Levenshtein distance between two strings
     Simple implementation without external dependencies
+    (fallback when rapidfuzz is not installed; JIT-compiled if numba is)
+    
+    If max_distance is given, returns max_distance + 1 as soon as the
+    distance is known to exceed it.
     """
+    # Length difference is a lower bound on the distance
+    if max_distance is not None and abs(len(s1) - len(s2)) > max_distance:
+        return max_distance + 1
+    
+    if NUMBA_AVAILABLE:
+        distance = _numba_distance(s1, s2)
+        if max_distance is not None and distance > max_distance:
+            return max_distance + 1
+        return distance
+    
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+        s1, s2 = s2, s1
     
     if len(s2) == 0:
         return len(s1)
@@ -26,11 +97,22 @@ def levenshtein_distance(s1: str, s2: str) -> int:
             deletions = current_row[j] + 1
             substitutions = previous_row[j] + (c1 != c2)
             current_row.append(min(insertions, deletions, substitutions))
+        # Row minimum never decreases, so stop once it passes the cap
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
         previous_row = current_row
     
+    if max_distance is not None and previous_row[-1] > max_distance:
+        return max_distance + 1
     return previous_row[-1]
 
 
+# Required/resume skill pairs recur across resumes in a batch ("python" vs
+# "python"), so fallback distances are memoized per (s1, s2, max_distance)
+DISTANCE_CACHE_SIZE = 100_000
+_cached_distance = lru_cache(maxsize=DISTANCE_CACHE_SIZE)(levenshtein_distance)
+
+
 class ResumeMatcher:
     """
     Match resumes against job requirements
@@ -55,11 +137,17 @@ class ResumeMatcher:
         Concept: Levenshtein distance measures the minimum number of 
         single-character edits needed to change one word into another
         
+        Inputs are compared as given; callers lowercase them once up front.
+        
         Returns:
             Similarity score between 0 and 1 (1 = identical)
         """
+        if RAPIDFUZZ_AVAILABLE:
+            # C implementation (bit-parallel), same 1 - distance / max_len score
+            return Levenshtein.normalized_similarity(str1, str2)
+        
         # Get Levenshtein distance using our implementation
-        distance = levenshtein_distance(str1.lower(), str2.lower())
+        distance = _cached_distance(str1, str2)
         
         # Convert to similarity score (0-1)
         max_len = max(len(str1), len(str2))
@@ -74,17 +162,41 @@ class ResumeMatcher:
         Check if a skill matches any skill in the list using fuzzy matching
         
         Args:
-            skill: Skill to match
-            skill_list: List of skills to match against
+            skill: Skill to match (lowercase)
+            skill_list: List of skills to match against (lowercase)
         
         Returns:
             (matched, best_match, similarity_score)
         """
+        if RAPIDFUZZ_AVAILABLE:
+            # Distance kernel and best-match search both run in C.
+            # No score_cutoff: rapidfuzz turns it into an integer distance
+            # bound and drops pairs sitting exactly on the threshold
+            result = process.extractOne(
+                skill,
+                skill_list,
+                scorer=Levenshtein.normalized_similarity
+            )
+            if result is None or result[1] <= 0:
+                return False, None, 0
+            best_match, best_score, _ = result
+            return best_score >= self.threshold, best_match, best_score
+        
         best_match = None
         best_score = 0
         
         for candidate_skill in skill_list:
-            similarity = self.levenshtein_similarity(skill, candidate_skill)
+            max_len = max(len(skill), len(candidate_skill))
+            if max_len == 0:
+                similarity = 1.0
+            elif skill in candidate_skill or candidate_skill in skill:
+                # Substring (python ~ python3): distance is just the length difference
+                similarity = 1 - (abs(len(skill) - len(candidate_skill)) / max_len)
+            else:
+                # Largest distance that can still reach the threshold
+                max_dist = int((1 - self.threshold) * max_len + 1e-9)
+                distance = _cached_distance(skill, candidate_skill, max_dist)
+                similarity = 1 - (distance / max_len)
             
             if similarity > best_score:
                 best_score = similarity
@@ -95,6 +207,34 @@ class ResumeMatcher:
         
         return matched, best_match, best_score
     
+    def best_matches(self, required_skills: List[str], skill_list: List[str]) -> List[tuple]:
+        """
+        Fuzzy match every required skill against the skill list
+        (both lowercase)
+        
+        Returns:
+            One (matched, best_match, similarity_score) tuple per required skill
+        """
+        if RAPIDFUZZ_AVAILABLE and required_skills and skill_list:
+            # Whole R x S similarity matrix in one multi-threaded C call
+            # (no score_cutoff, see fuzzy_match_skill)
+            scores = process.cdist(
+                required_skills,
+                skill_list,
+                scorer=Levenshtein.normalized_similarity,
+                dtype=np.float64,
+                workers=-1
+            )
+            best_idx = scores.argmax(axis=1)
+            best_scores = scores.max(axis=1)
+            matched = best_scores >= self.threshold
+            return [
+                (bool(matched[i]), skill_list[best_idx[i]] if matched[i] else None, float(best_scores[i]))
+                for i in range(len(required_skills))
+            ]
+        
+        return [self.fuzzy_match_skill(skill, skill_list) for skill in required_skills]
+    
     def match(self, resume_data: Dict, required_skills: List[str]) -> Dict:
         """
         Match a resume against required skills
@@ -123,22 +263,34 @@ class ResumeMatcher:
         resume_keywords = resume_data.get('keywords', [])
         all_resume_terms = resume_skills + resume_keywords
         
+        # Lowercase once per resume (not once per pair) and drop terms that
+        # appear in both skills and keywords
+        required_lower = [skill.lower() for skill in required_skills]
+        resume_by_lower = {}
+        for term in all_resume_terms:
+            resume_by_lower.setdefault(term.lower(), term)
+        resume_lower = list(resume_by_lower)
+        
         # Match each required skill
         matched_skills = []
         missing_skills = []
         match_details = []
         
-        for required_skill in required_skills:
-            matched, best_match, similarity = self.fuzzy_match_skill(
-                required_skill,
-                all_resume_terms
-            )
+        # Exact hits are resolved with hash lookups; only the rest need fuzzy matching
+        remaining = [skill for skill in required_lower if skill not in resume_by_lower]
+        fuzzy_results = dict(zip(remaining, self.best_matches(remaining, resume_lower)))
+        
+        for required_skill, skill_lower in zip(required_skills, required_lower):
+            if skill_lower in resume_by_lower:
+                matched, best_match, similarity = True, skill_lower, 1.0
+            else:
+                matched, best_match, similarity = fuzzy_results[skill_lower]
             
             if matched:
                 matched_skills.append(required_skill)
                 match_details.append({
                     'required': required_skill,
-                    'found': best_match,
+                    'found': resume_by_lower[best_match],
                     'similarity': round(similarity, 2)
                 })
             else:
@@ -9,11 +9,79 @@ Implements all NLP concepts:
 """
 
 import re
+from collections import Counter
+from functools import lru_cache
+from itertools import filterfalse
+from threading import Lock
 import nltk
 from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+from nltk.corpus import stopwords, wordnet
 from nltk.stem import WordNetLemmatizer, PorterStemmer
-from typing import List
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Compiled once at import (clean_text runs on every document)
+_TOKEN_RE = re.compile(r'[A-Za-z0-9]+')
+_CLEAN_RE = re.compile(r'[^a-zA-Z0-9\s]')
+
+# ASCII translate table for clean_text: lowercase letters, keep digits and
+# whitespace, everything else becomes a space (one C pass, no regex engine)
+_ASCII_CLEAN_TABLE = str.maketrans({
+    c: c.lower() if c.isalnum() or c.isspace() else ' '
+    for c in map(chr, range(128))
+})
+
+# NLTK data is checked, downloaded and loaded once per process
+_NLTK_RESOURCES = (
+    ('tokenizers/punkt', 'punkt'),
+    ('corpora/stopwords', 'stopwords'),
+    ('corpora/wordnet', 'wordnet'),
+)
+_NLTK_READY = False
+_NLTK_LOCK = Lock()
+_STOP_WORDS = frozenset()
+
+
+def _ensure_nltk() -> None:
+    """Download missing NLTK data and preload the corpora (first call only)"""
+    global _NLTK_READY, _STOP_WORDS
+    if _NLTK_READY:
+        return
+    with _NLTK_LOCK:
+        if _NLTK_READY:
+            return
+        for path, package in _NLTK_RESOURCES:
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                nltk.download(package)
+        
+        # WordNet loads lazily and that first load is not thread-safe;
+        # resumes are parsed on a threadpool, so load it up front
+        wordnet.ensure_loaded()
+        _STOP_WORDS = frozenset(stopwords.words('english'))
+        _NLTK_READY = True
+
+
+# Optional spaCy backend (NLPProcessor(backend="spacy")); tagger-based
+# lemmatization in Cython, with nlp.pipe() for batches
+SPACY_MODEL = "en_core_web_sm"
+
+
+def _load_spacy():
+    """Load the spaCy pipeline without parser/NER, or None if unavailable"""
+    try:
+        import spacy
+        return spacy.load(SPACY_MODEL, disable=["parser", "ner"])
+    except (ImportError, OSError) as e:
+        print(f"Warning: spaCy backend not available ({e}). Using NLTK.")
+        return None
 
 
 class NLPProcessor:
@@ -22,28 +90,34 @@ class NLPProcessor:
     Simple, clean implementation of fundamental NLP concepts
     """
     
-    def __init__(self):
-        """Initialize NLP components and download required data"""
-        # Download required NLTK data (run once)
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
-        
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
-        
-        try:
-            nltk.data.find('corpora/wordnet')
-        except LookupError:
-            nltk.download('wordnet')
+    def __init__(self, backend: str = "nltk"):
+        """
+        Initialize NLP components and download required data
+        
+        backend: "nltk" (default) or "spacy" for lemmatizing process() with
+        spaCy; NLTK is still used for stemming and keyword expansion
+        """
+        # Download/load required NLTK data (once per process)
+        _ensure_nltk()
         
         # Initialize tools
         self.lemmatizer = WordNetLemmatizer()
         self.stemmer = PorterStemmer()
-        self.stop_words = set(stopwords.words('english'))
+        self.stop_words = set(_STOP_WORDS)
+        
+        # Resumes repeat the same words constantly; lemmatizer and stemmer
+        # are pure functions of the token, so memoize them per token
+        self._lemmatize_token = lru_cache(maxsize=200_000)(self.lemmatizer.lemmatize)
+        self._stem_token = lru_cache(maxsize=200_000)(self.stemmer.stem)
+        
+        # One-entry memo for process(): (text, use_lemmatization, tokens)
+        self._last_processed = None
+        
+        self._spacy = _load_spacy() if backend == "spacy" else None
+        self.backend = "spacy" if self._spacy is not None else "nltk"
+        
+        # Job keywords like "tester" / "python" recur across searches
+        self.expand_keyword = lru_cache(maxsize=10_000)(self._expand_keyword)
     
     def clean_text(self, text: str) -> str:
         """
@@ -52,23 +126,31 @@ class NLPProcessor:
         - Remove special characters
         - Remove extra whitespace
         """
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters but keep spaces
-        text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
+        # Convert to lowercase and remove special characters but keep spaces
+        if text.isascii():
+            text = text.translate(_ASCII_CLEAN_TABLE)
+        else:
+            # lower() of non-ASCII text can yield ASCII letters (e.g. 'K' Kelvin sign)
+            text = _CLEAN_RE.sub(' ', text.lower())
         
         # Remove extra whitespace
+        # (split/join measured ~3x faster than a compiled \s+ substitution)
         text = ' '.join(text.split())
         
         return text
     
-    def tokenize(self, text: str) -> List[str]:
+    def tokenize(self, text: str, use_nltk: bool = False) -> List[str]:
         """
         Tokenize text into words
         Concept: Breaking text into individual tokens
+        
+        The default regex splitter is meant for cleaned text (alphanumerics and
+        spaces only). Use use_nltk=True for raw text where punctuation matters,
+        e.g. to keep "c++" or "node.js" as one token.
         """
-        return word_tokenize(text)
+        if use_nltk:
+            return word_tokenize(text)
+        return _TOKEN_RE.findall(text)
     
     def remove_stopwords(self, tokens: List[str]) -> List[str]:
         """
@@ -83,7 +165,7 @@ class NLPProcessor:
         Concept: Reducing words to their dictionary form
         Example: 'running' -> 'run', 'better' -> 'good'
         """
-        return [self.lemmatizer.lemmatize(token) for token in tokens]
+        return [self._lemmatize_token(token) for token in tokens]
     
     def stem(self, tokens: List[str]) -> List[str]:
         """
@@ -91,7 +173,26 @@ class NLPProcessor:
         Concept: Reducing words to their stem
         Example: 'running' -> 'run', 'developer' -> 'develop'
         """
-        return [self.stemmer.stem(token) for token in tokens]
+        return [self._stem_token(token) for token in tokens]
+    
+    def _expand_keyword(self, keyword: str) -> Tuple[str, ...]:
+        """
+        Expand a cleaned (lowercase) job keyword for matching
+        Returns the keyword, then its lemmatized and stemmed tokens
+        (use the cached expand_keyword)
+        """
+        # Tokenize first (required for lemmatization and stemming);
+        # keywords aren't cleaned, so keep NLTK's punctuation handling
+        tokens = self.tokenize(keyword, use_nltk=True)
+        # Lemmatized: dictionary form; stemmed: more aggressive word roots
+        # This helps match: tester → test, testing → test
+        expanded = [keyword] + self.lemmatize(tokens) + self.stem(tokens)
+        
+        # Manually add "test" for "tester" since Porter Stemmer doesn't stem it
+        if keyword == 'tester':
+            expanded.append('test')
+        
+        return tuple(expanded)
     
     def process(self, text: str, use_lemmatization: bool = True) -> List[str]:
         """
@@ -108,39 +209,105 @@ class NLPProcessor:
         Returns:
             Processed tokens
         """
-        # Step 1: Clean
-        cleaned = self.clean_text(text)
-        
-        # Step 2: Tokenize
-        tokens = self.tokenize(cleaned)
+        # The same text is often processed twice in a row (e.g. JobAnalyzer's
+        # skill and keyword extraction); reuse the last result. The memo is
+        # read and replaced as one tuple, so threads can't see a torn entry.
+        last = self._last_processed
+        if last is not None and last[1] == use_lemmatization and last[0] == text:
+            return list(last[2])
         
-        # Step 3: Remove stopwords
-        filtered = self.remove_stopwords(tokens)
-        
-        # Step 4: Lemmatize or stem
-        if use_lemmatization:
-            processed = self.lemmatize(filtered)
+        if use_lemmatization and self._spacy is not None:
+            processed = self._spacy_tokens(self._spacy(text))
         else:
-            processed = self.stem(filtered)
+            # Step 1: Clean (cleaned text is lowercase)
+            cleaned = self.clean_text(text)
+            
+            # Steps 2-3 (tokens are already lowercase; the filter loop runs in C)
+            tokens = list(filterfalse(self.stop_words.__contains__, self.tokenize(cleaned)))
+            
+            # Step 4: lemmatize/stem each distinct token once, then map the sequence
+            normalize = self._lemmatize_token if use_lemmatization else self._stem_token
+            normalized = {token: normalize(token) for token in set(tokens)}
+            processed = [normalized[token] for token in tokens]
         
-        return processed
+        self._last_processed = (text, use_lemmatization, processed)
+        return list(processed)
+    
+    @staticmethod
+    def _spacy_tokens(doc) -> List[str]:
+        """Lowercase lemmas of a spaCy Doc, without stopwords and non-words"""
+        return [token.lemma_.lower() for token in doc if token.is_alpha and not token.is_stop]
+    
+    def process_batch(self, texts: List[str], batch_size: int = 64, n_process: int = 1) -> List[List[str]]:
+        """
+        process() for many texts
+        With the spaCy backend the texts are streamed through nlp.pipe()
+        (n_process > 1 uses worker processes)
+        """
+        if self._spacy is None:
+            return [self.process(text) for text in texts]
+        return [
+            self._spacy_tokens(doc)
+            for doc in self._spacy.pipe(texts, batch_size=batch_size, n_process=n_process)
+        ]
     
-    def extract_keywords(self, text: str, top_n: int = 10) -> List[str]:
+    def extract_keywords(self, text: str, top_n: int = 10, tokens: Optional[List[str]] = None) -> List[str]:
         """
         Extract important keywords from text
         Uses frequency-based approach
+        
+        Pass tokens (output of process(text)) if the caller already has them.
         """
         # Process text
-        tokens = self.process(text)
+        if tokens is None:
+            tokens = self.process(text)
         
         # Count frequency
-        freq = {}
-        for token in tokens:
-            if len(token) > 2:  # Ignore very short words
-                freq[token] = freq.get(token, 0) + 1
+        freq = Counter(token for token in tokens if len(token) > 2)  # Ignore very short words
+        
+        # Return top N keywords (heap selection; ties keep first-seen order)
+        return [word for word, count in freq.most_common(top_n)]
+    
+    def extract_keywords_batch(self, texts: List[str], top_n: int = 10) -> List[List[str]]:
+        """
+        Extract keywords for many texts at once
+        Same result as extract_keywords on each text, but term counts for the
+        whole batch are built in one NumPy pass over a shared vocabulary
+        
+        Library API for bulk jobs (e.g. re-indexing stored resumes); the
+        request handlers parse one upload per thread and use extract_keywords.
+        """
+        docs = [[token for token in tokens if len(token) > 2] for tokens in self.process_batch(texts)]
+        if not NUMPY_AVAILABLE or not any(docs):
+            return [self.extract_keywords(text, top_n, tokens=doc) for text, doc in zip(texts, docs)]
         
-        # Sort by frequency
-        sorted_keywords = sorted(freq.items(), key=lambda x: x[1], reverse=True)
+        lengths = np.array([len(doc) for doc in docs])
+        vocab, inverse = np.unique(np.array([token for doc in docs for token in doc]), return_inverse=True)
+        rows = np.repeat(np.arange(len(docs)), lengths)
         
-        # Return top N keywords
-        return [word for word, count in sorted_keywords[:top_n]]
+        # Sparse counts: one entry per distinct (document, term) pair rather
+        # than dense docs x vocab matrices. Tokens are laid out document by
+        # document, so the first-occurrence index orders terms within a row
+        pairs, first_seen, counts = np.unique(
+            rows * len(vocab) + inverse, return_index=True, return_counts=True
+        )
+        pair_rows = pairs // len(vocab)
+        
+        # Per document: highest count first, ties in first-seen order
+        # (like Counter.most_common)
+        order = np.lexsort((first_seen, -counts, pair_rows))
+        terms = (pairs % len(vocab))[order]
+        starts = np.searchsorted(pair_rows[order], np.arange(len(docs) + 1))
+        return [
+            [str(vocab[j]) for j in terms[starts[i]:min(starts[i] + top_n, starts[i + 1])]]
+            for i in range(len(docs))
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_nlp_processor(backend: str = "nltk") -> NLPProcessor:
+    """
+    Shared NLPProcessor for the process (one per backend)
+    NLTK data checks and WordNet loading happen once, however often this is called
+    """
+    return NLPProcessor(backend)
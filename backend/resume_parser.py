@@ -6,7 +6,10 @@ Uses NLP processing and pattern matching
 
 import re
 import os
-from typing import Dict, List
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from typing import BinaryIO, Dict, List, Union
 import PyPDF2
 from docx import Document
 import docx2txt
@@ -19,7 +22,81 @@ except ImportError:
     OCR_AVAILABLE = False
     print("Warning: pytesseract or PIL not available. Image support disabled.")
 
-from nlp_processor import NLPProcessor
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+    # PDFium is not thread-safe and uploads are parsed on worker threads, so
+    # every pypdfium2 call (open, text extraction, close) holds this lock
+    _PDFIUM_LOCK = Lock()
+except ImportError:
+    PDFIUM_AVAILABLE = False
+    print("Warning: pypdfium2 not available. Using PyPDF2 for PDF text extraction.")
+
+from nlp_processor import NLPProcessor, get_nlp_processor
+
+
+# A file path, or an in-memory/uploaded file object opened in binary mode
+Source = Union[str, BinaryIO]
+
+# Regex patterns compiled once at import (used on every parse)
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Phone formats in one alternation, most specific first. 5551234567 and
+# 555-123-4567 are covered by the second branch. A country code is only
+# taken with a leading '+', so "Suite 200 555-123-4567" stays 555-123-4567.
+_PHONE_RE = re.compile(
+    r'(?<![\w+])\+\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'  # +1-555-123-4567
+    r'|\(?\d{3}\)?\s*[-.\s]?\d{3}[-.\s]?\d{4}'              # (555) 123-4567 or (555)123-4567 or 555-123-4567
+)
+
+# Technical terms with special characters (e.g., Node.js, C++, C#), fused
+# into one alternation so the text is scanned once
+_TECH_RE = re.compile(
+    r'\b[A-Z][a-zA-Z]*\.js\b'          # Node.js, Next.js, Vue.js
+    r'|\b[A-Z][a-zA-Z]*\+\+(?!\w)'     # C++
+    r'|\b[A-Z]#(?!\w)'                 # C#, F#
+    r'|\b[A-Z][a-zA-Z]+Script\b'       # JavaScript, TypeScript
+    r'|\b[A-Z]{2,}\b'                  # AWS, SQL, API, HTML, CSS
+    r'|\b[A-Z][a-z]+(?:[A-Z][a-z]+)+\b' # CamelCase: PostgreSQL, MongoDB
+)
+
+# Common multi-word technical terms (matched on lowercase text)
+_MULTI_WORD_RE = re.compile(
+    r'\b(?:machine learning|deep learning|data science|cloud computing|'
+    r'web development|full stack|front end|back end|software engineering|'
+    r'ci/cd|devops|microservices|rest api|graphql)\b'
+)
+
+# Tesseract: LSTM engine only, treat the page as one block of text (skips
+# page layout analysis). Larger scans are downscaled first since OCR time
+# grows with pixel count.
+OCR_CONFIG = '--oem 1 --psm 6'
+OCR_MAX_SIZE = (2000, 2000)
+# Scanned PDFs (no text layer) are rendered at ~200 DPI and OCR'd page by page
+OCR_PDF_SCALE = 200 / 72
+OCR_MAX_PDF_PAGES = 10
+# One shared pool for page OCR. Uploads are already parsed one per thread and
+# each tesseract process is itself multi-threaded, so this caps the number of
+# concurrent tesseract processes for the whole worker (threads start lazily,
+# after gunicorn has forked)
+OCR_MAX_WORKERS = 4
+_ocr_pool = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS, thread_name_prefix='ocr')
+
+# Common words that aren't skills (dropped in extract_skills step 4)
+_NON_SKILL_WORDS = frozenset({
+    'the', 'and', 'for', 'with', 'from', 'this', 'that',
+    'have', 'has', 'had', 'been', 'were', 'are', 'was'
+})
+
+# Skills and keywords are taken from the first SKILLS_MAX_CHARS characters
+# only. Skills sit in the first pages; long appendices just add regex and NLP
+# work. Email and phone are still searched in the full text (footers).
+SKILLS_MAX_CHARS = 50_000
+
+_EXP_RES = tuple(re.compile(p) for p in (
+    r'(\d+)\+?\s*(?:years?|yrs?)(?:\s+of)?\s+experience',
+    r'experience\s*:?\s*(\d+)\+?\s*(?:years?|yrs?)',
+))
 
 
 class ResumeParser:
@@ -32,48 +109,116 @@ class ResumeParser:
         """Initialize with NLP processor - NO HARDCODED SKILLS!"""
         self.nlp = nlp_processor
     
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
+    def extract_text_from_pdf(self, file_path: Source) -> str:
+        """
+        Extract text from PDF file (PDFium if installed, else PyPDF2)
+        Scanned PDFs without a text layer are OCR'd when OCR is available
+        """
+        text = self._extract_pdf_text_layer(file_path)
+        
+        if not text.strip() and OCR_AVAILABLE and PDFIUM_AVAILABLE:
+            if not isinstance(file_path, str):
+                file_path.seek(0)
+            try:
+                text = self.extract_text_from_images(self._render_pdf_pages(file_path))
+            except Exception as e:
+                print(f"PDF OCR error: {e}")
+        return text
+    
+    def _extract_pdf_text_layer(self, file_path: Source) -> str:
+        """Text embedded in the PDF (empty for scanned documents)"""
+        if PDFIUM_AVAILABLE:
+            try:
+                return self._extract_text_from_pdf_pdfium(file_path)
+            except Exception as e:
+                print(f"PDFium extraction error, falling back to PyPDF2: {e}")
+                if not isinstance(file_path, str):
+                    file_path.seek(0)
+        
+        pages = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
+            # Pages share the reader's underlying stream, so extract them
+            # sequentially; join once instead of concatenating per page
+            pdf_reader = PyPDF2.PdfReader(file_path)
+            for page in pdf_reader.pages:
+                pages.append(page.extract_text() or "")
         except Exception as e:
             print(f"PDF extraction error: {e}")
-        return text
+        return "".join(pages)
+    
+    def _extract_text_from_pdf_pdfium(self, file_path: Source) -> str:
+        """Extract text from PDF file with PDFium (C library, much faster than PyPDF2)"""
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                pages = []
+                for page in pdf:
+                    textpage = page.get_textpage()
+                    pages.append(textpage.get_text_bounded())
+                    # Free each page as we go instead of holding all of them until close()
+                    textpage.close()
+                    page.close()
+            finally:
+                pdf.close()
+        # PDFium emits CRLF line breaks
+        return "".join(pages).replace('\r\n', '\n')
     
-    def extract_text_from_txt(self, file_path: str) -> str:
+    def _render_pdf_pages(self, file_path: Source) -> list:
+        """Render the first OCR_MAX_PDF_PAGES pages as grayscale PIL images for OCR"""
+        images = []
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                for i in range(min(len(pdf), OCR_MAX_PDF_PAGES)):
+                    page = pdf[i]
+                    bitmap = page.render(scale=OCR_PDF_SCALE)
+                    # convert() copies, so the image outlives the PDFium bitmap
+                    images.append(bitmap.to_pil().convert('L'))
+                    bitmap.close()
+                    page.close()
+            finally:
+                pdf.close()
+        return images
+    
+    def extract_text_from_txt(self, file_path: Source) -> str:
         """Extract text from TXT file with multiple encoding fallbacks"""
         encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252', 'iso-8859-1']
         
+        try:
+            if isinstance(file_path, str):
+                with open(file_path, 'rb') as file:
+                    raw = file.read()
+            else:
+                raw = file_path.read()
+        except Exception as e:
+            print(f"TXT extraction error: {e}")
+            return ""
+        
         for encoding in encodings:
             try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    content = file.read()
-                    if content.strip():  # Check if content is not empty
-                        print(f"Successfully read TXT file with {encoding} encoding")
-                        return content
+                # Normalize newlines like text-mode open() does
+                content = raw.decode(encoding).replace('\r\n', '\n').replace('\r', '\n')
+                if content.strip():  # Check if content is not empty
+                    print(f"Successfully read TXT file with {encoding} encoding")
+                    return content
             except (UnicodeDecodeError, UnicodeError):
                 continue  # Try next encoding
             except Exception as e:
                 print(f"TXT extraction error with {encoding}: {e}")
                 continue
         
-        # If all encodings fail, try reading as binary and decode with errors='ignore'
+        # If all encodings fail, decode with errors='ignore'
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                content = file.read()
-                if content.strip():
-                    print("Read TXT file with UTF-8 (ignoring errors)")
-                    return content
+            content = raw.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+            if content.strip():
+                print("Read TXT file with UTF-8 (ignoring errors)")
+                return content
         except Exception as e:
             print(f"Final TXT extraction attempt failed: {e}")
         
         return ""  # Return empty string if all attempts fail
     
-    def extract_text_from_docx(self, file_path: str) -> str:
+    def extract_text_from_docx(self, file_path: Source) -> str:
         """Extract text from DOCX file including tables"""
         try:
             doc = Document(file_path)
@@ -105,7 +250,7 @@ class ResumeParser:
             print(error_msg)
             raise ValueError(error_msg)
     
-    def extract_text_from_doc(self, file_path: str) -> str:
+    def extract_text_from_doc(self, file_path: Source) -> str:
         """Extract text from old .doc format (Word 97-2003)"""
         
         # Method 1: Try docx2txt first (works for some .doc files)
@@ -117,14 +262,22 @@ class ResumeParser:
             pass
         
         # Method 2: Try using Word COM automation (Windows only)
+        temp_path = None
         try:
             import win32com.client
             
+            # Word can only open files on disk
+            if not isinstance(file_path, str):
+                file_path.seek(0)
+                with tempfile.NamedTemporaryFile(suffix='.doc', delete=False) as temp:
+                    temp.write(file_path.read())
+                    temp_path = temp.name
+            
             word = win32com.client.Dispatch("Word.Application")
             word.Visible = False
             
             # Open document with absolute path
-            doc = word.Documents.Open(os.path.abspath(file_path))
+            doc = word.Documents.Open(os.path.abspath(temp_path or file_path))
             text = doc.Content.Text
             
             # Close document and Word
@@ -140,6 +293,9 @@ class ResumeParser:
                 word.Quit()
             except:
                 pass
+        finally:
+            if temp_path:
+                os.remove(temp_path)
         
         # If both methods fail, give clear instructions
         raise ValueError(
@@ -148,22 +304,39 @@ class ResumeParser:
             "Open in Word → File → Save As → Word Document (*.docx)"
         )
     
-    def extract_text_from_image(self, file_path: str) -> str:
-        """Extract text from image using OCR"""
+    def extract_text_from_image(self, file_path: Source) -> str:
+        """Extract text from image using OCR (file_path may also be a PIL image)"""
         if not OCR_AVAILABLE:
             return "OCR not available. Install pytesseract and PIL."
         
         try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
+            image = file_path if isinstance(file_path, Image.Image) else Image.open(file_path)
+            image.thumbnail(OCR_MAX_SIZE)
+            text = pytesseract.image_to_string(image, config=OCR_CONFIG)
             return text
         except Exception as e:
             print(f"OCR extraction error: {e}")
             return ""
     
-    def extract_text(self, file_path: str) -> str:
-        """Extract text based on file type"""
-        file_lower = file_path.lower()
+    def extract_text_from_images(self, file_paths: List[Source]) -> str:
+        """
+        OCR several images (e.g. the pages of a scanned PDF) in parallel
+        Threads are enough: pytesseract runs the tesseract binary as a subprocess
+        """
+        return "\n".join(_ocr_pool.map(self.extract_text_from_image, file_paths))
+    
+    def extract_text(self, file_path: Source, filename: str = None) -> str:
+        """
+        Extract text based on file type
+        
+        file_path may also be a binary file object, in which case filename
+        gives the extension
+        """
+        file_lower = (filename or file_path).lower()
+        
+        # File objects may already have been read (e.g. an upload parsed twice)
+        if not isinstance(file_path, str):
+            file_path.seek(0)
         
         if file_lower.endswith('.pdf'):
             return self.extract_text_from_pdf(file_path)
@@ -185,81 +358,50 @@ class ResumeParser:
     
     def extract_email(self, text: str) -> str:
         """Extract email using regex"""
-        pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        match = re.search(pattern, text)
+        match = _EMAIL_RE.search(text)
         return match.group(0) if match else ""
     
     def extract_phone(self, text: str) -> str:
         """Extract phone number using regex - multiple formats supported"""
-        patterns = [
-            r'\(?\d{3}\)?\s*[-.\s]?\d{3}[-.\s]?\d{4}',  # (555) 123-4567 or (555)123-4567 or 555-123-4567
-            r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # +1-555-123-4567
-            r'\d{10}',  # 5551234567
-            r'\d{3}[-.\s]\d{3}[-.\s]\d{4}'  # 555-123-4567
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(0)
-        return ""
+        match = _PHONE_RE.search(text)
+        return match.group(0) if match else ""
     
-    def extract_skills(self, text: str) -> List[str]:
+    def extract_skills(self, text: str, tokens: List[str] = None,
+                       max_chars: int = SKILLS_MAX_CHARS) -> List[str]:
         """
         Extract skills using improved NLP + technical term preservation
         Captures both processed and original technical terms
+        
+        tokens: output of nlp.process(text[:max_chars]), if the caller already has it
+        max_chars: only this many leading characters of text are scanned
         """
+        text = text[:max_chars]
         skills = []
+        text_lower = text.lower()
+        
+        # parse() passes the tokens it also uses for its keyword list
+        if tokens is None:
+            tokens = self.nlp.process(text)
         
         # Step 1: Extract keywords using NLP (TF-based importance)
-        keywords = self.nlp.extract_keywords(text, top_n=30)
+        keywords = self.nlp.extract_keywords(text, top_n=30, tokens=tokens)
         skills.extend(keywords)
         
         # Step 2: Capture technical terms with special characters (e.g., Node.js, C++, C#)
         # Look for capitalized words and technical patterns
-        technical_patterns = [
-            r'\b[A-Z][a-zA-Z]*\.js\b',  # Node.js, Next.js, Vue.js
-            r'\b[A-Z][a-zA-Z]+\+\+\b',  # C++
-            r'\b[A-Z]#\b',              # C#, F#
-            r'\b[A-Z][a-zA-Z]+Script\b', # JavaScript, TypeScript
-            r'\b[A-Z]{2,}\b',           # AWS, SQL, API, HTML, CSS
-            r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)+\b',  # CamelCase: PostgreSQL, MongoDB
-        ]
-        
-        for pattern in technical_patterns:
-            matches = re.findall(pattern, text)
-            skills.extend([m.lower() for m in matches])
+        skills.extend([m.lower() for m in _TECH_RE.findall(text)])
         
         # Step 3: Extract common multi-word technical terms
-        multi_word_patterns = [
-            r'\b(?:machine learning|deep learning|data science|cloud computing|'
-            r'web development|full stack|front end|back end|software engineering|'
-            r'ci/cd|devops|microservices|rest api|graphql)\b'
-        ]
-        
-        for pattern in multi_word_patterns:
-            matches = re.findall(pattern, text.lower())
-            skills.extend(matches)
-        
-        # Step 4: Tokenize and find frequently mentioned terms
-        tokens = self.nlp.tokenize(text.lower())
-        lemmatized = self.nlp.lemmatize(text.lower())
+        skills.extend(_MULTI_WORD_RE.findall(text_lower))
         
-        for token in set(lemmatized):
-            if len(token) > 2 and token not in skills:
-                # Add if appears multiple times
-                if text.lower().count(token) >= 2:
-                    skills.append(token)
-        
-        # Step 5: Clean and deduplicate
+        # Step 4: Clean and deduplicate
         unique_skills = []
         seen = set()
         for skill in skills:
             skill_clean = skill.strip().lower()
             if skill_clean and len(skill_clean) > 1 and skill_clean not in seen:
                 # Filter out common words that aren't skills
-                common_words = {'the', 'and', 'for', 'with', 'from', 'this', 'that', 
-                               'have', 'has', 'had', 'been', 'were', 'are', 'was'}
-                if skill_clean not in common_words:
+                if skill_clean not in _NON_SKILL_WORDS:
                     unique_skills.append(skill_clean)
                     seen.add(skill_clean)
         
@@ -270,21 +412,19 @@ class ResumeParser:
         Extract years of experience
         Looks for patterns like "5 years experience", "3+ years"
         """
-        patterns = [
-            r'(\d+)\+?\s*(?:years?|yrs?)(?:\s+of)?\s+experience',
-            r'experience\s*:?\s*(\d+)\+?\s*(?:years?|yrs?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text.lower())
+        text_lower = text.lower()
+        for pattern in _EXP_RES:
+            match = pattern.search(text_lower)
             if match:
                 return f"{match.group(1)} years"
         
         return "Not specified"
     
-    def parse(self, file_path: str) -> Dict:
+    def parse(self, file_path: Source, filename: str = None,
+              max_chars: int = SKILLS_MAX_CHARS) -> Dict:
         """
         Parse resume and extract all information
+        max_chars bounds the text scanned for skills and keywords
         
         Returns:
             Dictionary with extracted data:
@@ -292,19 +432,23 @@ class ResumeParser:
         """
         try:
             # Extract text
-            text = self.extract_text(file_path)
+            text = self.extract_text(file_path, filename)
             
             if not text:
                 return {"error": "Could not extract text from file"}
             
             # Extract information
+            # Skills and keywords share one run of the NLP pipeline
+            head = text[:max_chars]
+            tokens = self.nlp.process(head)
+            
             email = self.extract_email(text)
             phone = self.extract_phone(text)
-            skills = self.extract_skills(text)
+            skills = self.extract_skills(head, tokens, max_chars)
             experience = self.extract_experience(text)
             
             # Extract keywords using NLP
-            keywords = self.nlp.extract_keywords(text, top_n=15)
+            keywords = self.nlp.extract_keywords(head, top_n=15, tokens=tokens)
             
             return {
                 "email": email,
@@ -317,3 +461,33 @@ class ResumeParser:
         
         except Exception as e:
             return {"error": str(e)}
+    
+    def parse_batch(self, file_paths: List[str], max_workers: int = None) -> List[Dict]:
+        """
+        Parse many resume files in parallel worker processes
+        Results are returned in the same order as file_paths
+        """
+        if len(file_paths) <= 1:
+            return [self.parse(path) for path in file_paths]
+        
+        workers = min(len(file_paths), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(getattr(self.nlp, 'backend', 'nltk'),)
+        ) as pool:
+            return list(pool.map(_parse_in_worker, file_paths))
+
+
+# Each batch worker process builds its own parser once (NLTK data is loaded
+# per process, and the memoized NLP helpers can't be pickled across)
+_worker_parser = None
+
+def _init_worker(backend: str) -> None:
+    """ProcessPoolExecutor initializer for parse_batch"""
+    global _worker_parser
+    _worker_parser = ResumeParser(get_nlp_processor(backend))
+
+def _parse_in_worker(file_path: str) -> Dict:
+    """Parse one file in a parse_batch worker"""
+    return _worker_parser.parse(file_path)
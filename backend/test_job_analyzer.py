@@ -0,0 +1,34 @@
+"""
+Regression tests for JobAnalyzer skill extraction
+Run from backend/: python -m unittest test_job_analyzer
+"""
+import unittest
+
+from job_analyzer import JobAnalyzer, _TECH_PATTERN
+
+
+class StubNLP:
+    """Stands in for NLPProcessor: no keywords, so only the patterns contribute"""
+
+    def extract_keywords(self, text, top_n=10, tokens=None):
+        return []
+
+
+class TestTechTerms(unittest.TestCase):
+
+    def test_symbol_terms(self):
+        found = [m.group(0).lower() for m in _TECH_PATTERN.finditer("Skills: C++, C#, F# and Node.js")]
+        for term in ('c++', 'c#', 'f#', 'node.js'):
+            self.assertIn(term, found)
+
+
+class TestShortDescription(unittest.TestCase):
+
+    def test_keeps_multi_word_terms(self):
+        skills = JobAnalyzer(StubNLP()).extract_skills("Machine learning engineer, REST API, CI/CD, C#")
+        for term in ('machine learning', 'rest api', 'ci/cd', 'c#'):
+            self.assertIn(term, skills)
+
+
+if __name__ == '__main__':
+    unittest.main()
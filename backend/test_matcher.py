@@ -0,0 +1,40 @@
+"""
+Regression tests for ResumeMatcher
+Run from backend/: python -m unittest test_matcher
+"""
+import unittest
+from unittest import mock
+
+import matcher
+from matcher import ResumeMatcher
+
+
+def match_pure_python(resume_data, required_skills):
+    """match() with rapidfuzz and numba disabled (pure-Python distance)"""
+    with mock.patch.object(matcher, 'RAPIDFUZZ_AVAILABLE', False), \
+         mock.patch.object(matcher, 'NUMBA_AVAILABLE', False):
+        return ResumeMatcher().match(resume_data, required_skills)
+
+
+class TestMatchThreshold(unittest.TestCase):
+
+    def test_threshold_equal_score_is_a_match(self):
+        # 1 - 2/5 == 0.6, exactly the default threshold
+        result = ResumeMatcher().match({'skills': ['mysql'], 'keywords': []}, ['sql'])
+        self.assertEqual(result['matched_skills'], ['sql'])
+        self.assertEqual(result['match_details'][0]['found'], 'mysql')
+
+    def test_matches_pure_python_path(self):
+        resume = {
+            'skills': ['MySQL', 'python3', 'testing', 'Docker'],
+            'keywords': ['react.js', 'kubernetes']
+        }
+        required = ['sql', 'Python', 'tester', 'react', 'java', 'docker', 'aws']
+        self.assertEqual(
+            ResumeMatcher().match(resume, required),
+            match_pure_python(resume, required)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
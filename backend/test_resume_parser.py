@@ -0,0 +1,41 @@
+"""
+Regression tests for ResumeParser pattern extraction
+Run from backend/: python -m unittest test_resume_parser
+"""
+import unittest
+
+from resume_parser import ResumeParser, _TECH_RE
+
+
+class TestPhone(unittest.TestCase):
+
+    def setUp(self):
+        # extract_phone is pure regex, no NLP processor needed
+        self.parser = ResumeParser(None)
+
+    def test_number_before_phone_is_not_a_country_code(self):
+        self.assertEqual(self.parser.extract_phone("Suite 200 555-123-4567"), "555-123-4567")
+
+    def test_plus_country_code_is_kept(self):
+        self.assertEqual(self.parser.extract_phone("+1 (555) 123-4567"), "+1 (555) 123-4567")
+        self.assertEqual(self.parser.extract_phone("Tel +1-555-123-4567"), "+1-555-123-4567")
+
+    def test_local_formats(self):
+        self.assertEqual(self.parser.extract_phone("(555) 987-6543"), "(555) 987-6543")
+        self.assertEqual(self.parser.extract_phone("call 5551234567"), "5551234567")
+        self.assertEqual(self.parser.extract_phone("no phone here"), "")
+
+
+class TestTechTerms(unittest.TestCase):
+
+    def test_symbol_terms(self):
+        found = [m.lower() for m in _TECH_RE.findall("Skills: C++, C#, F# and Node.js")]
+        for term in ('c++', 'c#', 'f#', 'node.js'):
+            self.assertIn(term, found)
+
+    def test_symbol_terms_at_end_of_text(self):
+        self.assertEqual(_TECH_RE.findall("Languages C#"), ['C#'])
+
+
+if __name__ == '__main__':
+    unittest.main()
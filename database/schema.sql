@@ -134,3 +134,79 @@ CREATE TRIGGER update_resumes_updated_at BEFORE UPDATE ON resumes
 CREATE INDEX IF NOT EXISTS idx_resumes_user_created ON resumes(user_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_resumes_name ON resumes(name);
 CREATE INDEX IF NOT EXISTS idx_resumes_skills ON resumes USING GIN(skills);
+CREATE INDEX IF NOT EXISTS idx_job_searches_user_created ON job_searches(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_match_results_user_created ON match_results(user_id, created_at DESC);
+
+-- Match count and average score computed in one pass over match_results
+CREATE OR REPLACE FUNCTION user_match_stats(uid UUID)
+RETURNS TABLE(cnt BIGINT, avg_score NUMERIC) AS $$
+    SELECT COUNT(*), COALESCE(ROUND(AVG(match_score)::NUMERIC, 2), 0)
+    FROM match_results
+    WHERE user_id = uid
+$$ LANGUAGE sql STABLE;
+
+-- Dashboard statistics in a single round-trip (called via rpc('get_dashboard_stats'))
+CREATE OR REPLACE FUNCTION get_dashboard_stats(uid UUID)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_resumes', (SELECT COUNT(*) FROM resumes WHERE user_id = uid),
+        'total_job_searches', (SELECT COUNT(*) FROM job_searches WHERE user_id = uid),
+        'total_matches', ms.cnt,
+        'avg_match_score', ms.avg_score,
+        'recent_activity', (
+            SELECT COALESCE(json_agg(r), '[]'::JSON)
+            FROM (
+                SELECT mr.id, mr.job_search_id, mr.resume_id, mr.match_score,
+                       mr.matched_skills, mr.missing_skills, mr.created_at,
+                       json_build_object('filename', res.filename, 'name', res.name) AS resumes,
+                       json_build_object('job_title', js.job_title) AS job_searches
+                FROM match_results mr
+                LEFT JOIN resumes res ON res.id = mr.resume_id
+                LEFT JOIN job_searches js ON js.id = mr.job_search_id
+                WHERE mr.user_id = uid
+                ORDER BY mr.created_at DESC
+                LIMIT 10
+            ) r
+        )
+    )
+    FROM user_match_stats(uid) ms
+$$ LANGUAGE sql STABLE;
+
+-- Trigram indexes so substring search (ILIKE '%q%') on name/email can use an index
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_resumes_name_trgm ON resumes USING GIN(name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_resumes_email_trgm ON resumes USING GIN(email gin_trgm_ops);
+
+-- Resume search with the query passed as a bound parameter
+CREATE OR REPLACE FUNCTION search_resumes(uid UUID, q TEXT)
+RETURNS SETOF resumes AS $$
+    SELECT * FROM resumes
+    WHERE user_id = uid
+      AND (name ILIKE '%' || q || '%' OR email ILIKE '%' || q || '%')
+    ORDER BY created_at DESC
+$$ LANGUAGE sql STABLE;
+
+-- Paginated list queries. PL/pgSQL (not LANGUAGE sql, whose single-statement
+-- bodies are inlined into the caller and never plan-cached) so each pooled
+-- connection prepares the query once and reuses its plan
+CREATE OR REPLACE FUNCTION list_user_resumes(uid UUID, lim INT, off INT)
+RETURNS SETOF resumes AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM resumes
+    WHERE user_id = uid
+    ORDER BY created_at DESC
+    LIMIT lim OFFSET off;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION list_user_job_searches(uid UUID, lim INT, off INT)
+RETURNS SETOF job_searches AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM job_searches
+    WHERE user_id = uid
+    ORDER BY created_at DESC
+    LIMIT lim OFFSET off;
+END;
+$$ LANGUAGE plpgsql STABLE;